@@ -1,13 +1,73 @@
 import os
 import sys
-from sumolib import net
-import traci
-from sumolib.xml import create_document
+import argparse
+import pathlib
+from sumolib import net, geomhelper
+try:
+    # libsumo exposes the TraCI API in-process, without a subprocess and socket
+    import libsumo as traci
+except ImportError:
+    import traci
 import subprocess
-import random
+import operator
+import pickle
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+from scipy.spatial import cKDTree
+from xml.sax.saxutils import escape
 
-def find_route(net_file, start_edge, end_edge):
-    # Initialize SUMO with TraCI
+# Resolved once, so the script and SUMO do not depend on the working directory
+DATA_DIR = pathlib.Path(__file__).resolve().parent.parent / "data"
+NET_FILE = str(DATA_DIR / "test.net.xml")
+ROUTE_FILE = str(DATA_DIR / "route.rou.xml")
+SETTINGS_FILE = str(DATA_DIR / "settings.xml")
+
+def extract_edge_data(network):
+    # Flat copy of what the script needs from the passenger edges. Unlike the
+    # sumolib Net, whose edges and nodes reference each other, it pickles
+    # without recursing through the network.
+    edges = [edge for edge in network.getEdges() if edge.allows('passenger')]
+    valid = {edge.getID() for edge in edges}
+    return {
+        edge.getID(): {
+            "shape": [point[:2] for point in edge.getShape()],
+            "length": edge.getLength(),
+            # Only follow connections passenger cars may use
+            "successors": [out.getID() for out in edge.getAllowedOutgoing('passenger') if out.getID() in valid],
+            "from": edge.getFromNode().getCoord()[:2],
+            "to": edge.getToNode().getCoord()[:2],
+        }
+        for edge in edges
+    }
+
+def read_edge_data(net_file):
+    # Reuse the cached edge data while it is newer than the net file
+    cache_file = net_file + ".edges.pkl"
+    if os.path.exists(cache_file) and os.path.getmtime(net_file) < os.path.getmtime(cache_file):
+        try:
+            with open(cache_file, "rb") as f:
+                return pickle.load(f)
+        except Exception as e:
+            print(f"Warning: Could not load cached edge data, parsing {net_file}: {e}")
+    
+    edge_data = extract_edge_data(net.readNet(net_file))
+    
+    # Write to a temporary file first, so an interrupted dump leaves no partial cache
+    tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_file, "wb") as f:
+            pickle.dump(edge_data, f, protocol=5)
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        print(f"Warning: Could not cache edge data: {e}")
+    finally:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+    return edge_data
+
+def init_sumo(net_file):
+    # Initialize SUMO once for all route queries
     if 'SUMO_HOME' in os.environ:
         tools = os.path.join(os.environ['SUMO_HOME'], 'tools')
         sys.path.append(tools)
@@ -16,43 +76,57 @@ def find_route(net_file, start_edge, end_edge):
     
     # Start SUMO in simulation mode
     sumo_binary = "sumo"
-    sumo_cmd = [sumo_binary, "-n", net_file, "--no-step-log", "--no-warnings"]
+    sumo_cmd = [sumo_binary, "-n", net_file, "--no-step-log", "--no-warnings",
+                "--no-internal-links", "true"]  # Junction internals are not needed for routing
     traci.start(sumo_cmd)
+
+def shutdown_sumo():
+    traci.close()
+
+_findRoute = traci.simulation.findRoute
+
+def find_route(start_edge, end_edge):
+    return tuple(_findRoute(start_edge, end_edge, vType="DEFAULT_VEHTYPE").edges) or None
+
+def build_graph_router(edge_data, edge_ids):
+    # Edges are the graph nodes, the cost of a turn is the length of the edge entered
+    index = {edge_id: i for i, edge_id in enumerate(edge_ids)}
+    lengths = np.array([edge_data[edge_id]["length"] for edge_id in edge_ids])
+    rows = []
+    cols = []
+    for edge_id, outgoing in passenger_successors(edge_data, edge_ids).items():
+        for out_id in outgoing:
+            rows.append(index[edge_id])
+            cols.append(index[out_id])
+    graph = csr_matrix((lengths[cols], (rows, cols)), shape=(len(edge_ids), len(edge_ids)))
     
-    try:
-        route = traci.simulation.findRoute(start_edge, end_edge, vType="DEFAULT_VEHTYPE")
+    def route(start_edge, end_edge, limit=np.inf):
+        # limit bounds the length driven between the start and the destination edge,
+        # so the search does not have to cover the whole network
+        source = index[start_edge]
+        target = index[end_edge]
+        distances, predecessors = dijkstra(graph, indices=source, return_predecessors=True,
+                                           limit=limit + lengths[target])
+        if np.isinf(distances[target]):
+            return None
         
-        if route.edges:
-            return route.edges
-        return None
-            
-    finally:
-        traci.close()
+        # Walk the predecessors back from the destination
+        path = [target]
+        while path[-1] != source:
+            path.append(predecessors[path[-1]])
+        return tuple(edge_ids[i] for i in reversed(path))
+    
+    return route
 
-def save_route_to_file(edges, valid_edges, net_file, output_file="../data/route.rou.xml"):
+def xml_attr(value):
+    # Escape a value for a double-quoted XML attribute
+    return escape(value, {'"': "&quot;"})
+
+def save_route_to_file(edges, valid_edges, edge_data, edge_tree, tree_edge_ids, output_file=ROUTE_FILE):
     print(f"Creating routes with {len(valid_edges)} valid edges")
-    routes = create_document("routes")
-    
-    # Add vType definitions
-    routes.addChild("vType", attrs={
-        "id": "car",
-        "accel": "2.6",
-        "decel": "4.5",
-        "sigma": "0.5",
-        "length": "5",
-        "maxSpeed": "70",
-        "color": "0,0,1"  # Blue color
-    })
     
-    routes.addChild("vType", attrs={
-        "id": "highlighted_car",
-        "accel": "2.6",
-        "decel": "4.5",
-        "sigma": "0.5",
-        "length": "5",
-        "maxSpeed": "70",
-        "color": "1,0,0"  # Red color
-    })
+    # Route random vehicles in-process instead of querying SUMO for every pair
+    find_random_route = build_graph_router(edge_data, valid_edges)
     
     # Store vehicles in a list to sort them later
     vehicles = []
@@ -61,8 +135,8 @@ def save_route_to_file(edges, valid_edges, net_file, output_file="../data/route.
     vehicles.append({
         "id": "route_highlight",
         "type": "highlighted_car",
-        "depart": "2",  # Start at 2 seconds
-        "edges": edges
+        "depart": 2.0,  # Start at 2 seconds
+        "edges_str": " ".join(edges)
     })
     
     # Add random vehicles with valid routes
@@ -71,192 +145,330 @@ def save_route_to_file(edges, valid_edges, net_file, output_file="../data/route.
     max_attempts = 1000
     attempts = 0
     
-    while added_vehicles < num_random_vehicles and attempts < max_attempts:
-        start_edge = random.choice(valid_edges)
-        end_edge = random.choice(valid_edges)
+    # Prefer destinations near the start edge, widening the search radius
+    # whenever too few of the recent attempts found a route
+    sample_edges = set(valid_edges)
+    radius = 500  # initial search radius in meters
+    max_detour = 3  # routes may be this many times longer than the search radius
+    min_success_rate = 0.5
+    check_interval = 20  # attempts between success rate checks
+    recent_successes = 0
+    tried_pairs = set()
+    
+    # Sample all start edges and departure times up front,
+    # spreading departure times from 0 to 200 seconds
+    start_indices = np.random.randint(len(valid_edges), size=max_attempts)
+    depart_times = np.random.uniform(0, 200, max_attempts)
+    
+    for i, start_index in enumerate(start_indices):
+        attempts += 1
+        
+        # Pick the destination among the edges within the radius,
+        # skipping pairs which were already tried
+        start_edge = valid_edges[start_index]
+        centroid = np.mean(edge_data[start_edge]["shape"], axis=0)
+        nearby = [
+            edge_id for edge_id in dict.fromkeys(tree_edge_ids[j] for j in edge_tree.query_ball_point(centroid, radius))
+            if edge_id in sample_edges
+        ] or valid_edges
+        nearby = [edge_id for edge_id in nearby if edge_id != start_edge and (start_edge, edge_id) not in tried_pairs]
         
-        # Find a valid route between the random edges
-        random_route = find_route(net_file, start_edge, end_edge)
+        random_route = None
+        if nearby:
+            end_edge = nearby[np.random.randint(len(nearby))]
+            tried_pairs.add((start_edge, end_edge))
+            
+            # Find a valid route between the random edges
+            random_route = find_random_route(start_edge, end_edge, limit=max_detour * radius)
         
         if random_route:
-            # Spread departure times from 0 to 200 seconds
-            depart_time = random.uniform(0, 200)
+            # Join the edges once, for both the log and the routes file
+            edges_str = " ".join(random_route)
             vehicles.append({
                 "id": f"random_vehicle_{added_vehicles}",
                 "type": "car",
-                "depart": f"{depart_time:.1f}",
-                "edges": random_route
+                "depart": float(depart_times[i]),
+                "edges_str": edges_str
             })
-            print(f"Added random vehicle {added_vehicles}: {' '.join(random_route)}")
+            print(f"Added random vehicle {added_vehicles}: {edges_str}")
             added_vehicles += 1
+            recent_successes += 1
+            if added_vehicles == num_random_vehicles:
+                break
         
-        attempts += 1
+        if attempts % check_interval == 0:
+            if recent_successes < min_success_rate * check_interval:
+                radius *= 2
+            recent_successes = 0
     
     print(f"Successfully added {added_vehicles} random vehicles after {attempts} attempts")
     
     # Sort vehicles by departure time
-    vehicles.sort(key=lambda x: float(x["depart"]))
-    
-    # Add sorted vehicles to the routes document
-    for v in vehicles:
-        vehicle = routes.addChild("vehicle", attrs={
-            "id": v["id"],
-            "type": v["type"],
-            "depart": v["depart"]
-        })
-        vehicle.addChild("route", attrs={"edges": " ".join(v["edges"])})
+    vehicles.sort(key=operator.itemgetter("depart"))
     
+    # Stream the routes file instead of building the whole document in memory
     with open(output_file, "w") as f:
-        f.write(routes.toXML())
+        f.write('<routes xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
+                'xsi:noNamespaceSchemaLocation="http://sumo.dlr.de/xsd/routes_file.xsd">\n')
+        
+        # vType definitions
+        f.write('    <vType accel="2.6" color="0,0,1" decel="4.5" id="car" length="5" '
+                'maxSpeed="70" sigma="0.5"/>\n')  # Blue color
+        f.write('    <vType accel="2.6" color="1,0,0" decel="4.5" id="highlighted_car" length="5" '
+                'maxSpeed="70" sigma="0.5"/>\n')  # Red color
+        
+        # Sorted vehicles
+        for v in vehicles:
+            f.write(f'    <vehicle depart="{v["depart"]:.1f}" id="{xml_attr(v["id"])}" type="{xml_attr(v["type"])}">\n'
+                    f'        <route edges="{xml_attr(v["edges_str"])}"/>\n'
+                    f'    </vehicle>\n')
+        
+        f.write('</routes>\n')
 
-def is_valid_vehicle_edge(network, edge_id):
-    edge = network.getEdge(edge_id)
-    if edge is None:
-        return False
-    
-    # Check each lane's allowed vehicles
-    for lane in edge.getLanes():
-        # Get the allowed vehicle classes for this lane
-        # Check if passenger vehicles are explicitly allowed
-        # or if the lane allows all vehicles (empty allowed set)
-        if lane.allows('passenger'):
-            return True
-    return False
+def passenger_successors(edge_data, valid_edges):
+    # Successor graph between valid edges, following only connections passenger cars may use
+    valid = set(valid_edges)
+    return {
+        edge_id: [out_id for out_id in edge_data[edge_id]["successors"] if out_id in valid]
+        for edge_id in valid_edges
+    }
 
-def save_visualization_settings(edges, output_file="../data/settings.xml"):
-    settings = create_document("viewsettings")
-    
-    # Add global settings
-    settings.addChild("viewport", attrs={
-        "x": "0",
-        "y": "0",
-        "zoom": "100"
-    })
-    
-    # Add scheme for edges
-    scheme = settings.addChild("scheme", attrs={"name": "real world"})
+def largest_connected_edges(edge_data, valid_edges):
+    successors = passenger_successors(edge_data, valid_edges)
     
-    # Add edges settings
-    edges_scheme = scheme.addChild("edges", attrs={
-        "laneWidth": "2",
-        "showLinkDecals": "true",
-        "showRails": "true",
-        "hideConnectors": "false"
-    })
+    # Iterative Tarjan's algorithm for strongly connected components
+    index = {}
+    lowlink = {}
+    stack = []
+    on_stack = set()
+    largest = []
+    counter = 0
+    for root in valid_edges:
+        if root in index:
+            continue
+        work = [(root, iter(successors[root]))]
+        index[root] = lowlink[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        while work:
+            node, children = work[-1]
+            for child in children:
+                if child not in index:
+                    index[child] = lowlink[child] = counter
+                    counter += 1
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(successors[child])))
+                    break
+                if child in on_stack:
+                    lowlink[node] = min(lowlink[node], index[child])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index[node]:
+                    # Node is the root of a component, pop it off the stack
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    if len(component) > len(largest):
+                        largest = component
     
-    # Default edge appearance
-    edges_scheme.addChild("colorScheme", attrs={
-        "name": "selection",
-        "value": "0.7,0.7,0.7"  # Default gray color
-    })
+    # Keep the original edge order
+    largest = set(largest)
+    return [edge_id for edge_id in valid_edges if edge_id in largest]
+
+def save_visualization_settings(edges, output_file=SETTINGS_FILE):
+    # Stream the settings file instead of building the whole document in memory
+    with open(output_file, "w") as f:
+        f.write('<viewsettings xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
+                'xsi:noNamespaceSchemaLocation="http://sumo.dlr.de/xsd/viewsettings_file.xsd">\n')
+        
+        # Global settings
+        f.write('    <viewport x="0" y="0" zoom="100"/>\n')
+        
+        # Scheme for edges
+        f.write('    <scheme name="real world">\n')
+        f.write('        <edges hideConnectors="false" laneWidth="2" showLinkDecals="true" showRails="true">\n')
+        
+        # Default edge appearance, gray color
+        f.write('            <colorScheme name="selection" value="0.7,0.7,0.7"/>\n')
+        
+        # Specifically color the selected edges
+        f.write('            <selections friendlyPos="true">\n')
+        
+        # Add each edge of the route to the selection with bright red color and wider edges
+        for edge in edges:
+            f.write(f'                <selection color="255,0,0" id="{xml_attr(edge)}" width="4"/>\n')
+        
+        f.write('            </selections>\n')
+        f.write('        </edges>\n')
+        f.write('    </scheme>\n')
+        f.write('</viewsettings>\n')
+
+# Spacing of the points indexed along each edge shape, in meters
+EDGE_INDEX_STEP = 10.0
+
+def build_edge_index(edge_data, valid_edges):
+    # Index points along the valid edge shapes, densified so that every part of
+    # an edge lies within EDGE_INDEX_STEP / 2 of an indexed point
+    shapes = [edge_data[edge_id]["shape"] for edge_id in valid_edges]
+    counts = np.array([len(shape) for shape in shapes])
+    vertices = np.array([point for shape in shapes for point in shape])
     
-    # Specifically color the selected edges
-    selections = edges_scheme.addChild("selections", attrs={
-        "friendlyPos": "true"
-    })
+    # Every vertex starts a segment to the next vertex of its edge, the last
+    # vertex of an edge is a zero-length segment of its own
+    last = np.cumsum(counts) - 1
+    ends = np.roll(vertices, -1, axis=0)
+    ends[last] = vertices[last]
     
-    # Add each edge of the route to the selection with bright red color
-    for edge in edges:
-        selections.addChild("selection", attrs={
-            "id": edge,
-            "color": "255,0,0",  # Bright red
-            "width": "4"  # Make the edges wider
-        })
+    # Split all segments into pieces of at most EDGE_INDEX_STEP at once
+    pieces = np.maximum(1, np.ceil(np.linalg.norm(ends - vertices, axis=1) / EDGE_INDEX_STEP).astype(int))
+    segment = np.repeat(np.arange(len(vertices)), pieces)
+    t = (np.arange(len(segment)) - np.repeat(np.cumsum(pieces) - pieces, pieces)) / pieces[segment]
+    points = vertices[segment] + (ends - vertices)[segment] * t[:, None]
     
-    with open(output_file, "w") as f:
-        f.write(settings.toXML())
+    vertex_edges = np.repeat(np.arange(len(valid_edges)), counts)
+    edge_ids = [valid_edges[i] for i in vertex_edges[segment]]
+    return cKDTree(points), edge_ids
 
-def find_nearest_edge(net, x, y):
-    radius = 0.1  # 100 meters initial search radius
-    max_radius = 1000  # maximum search radius in meters
+def find_nearest_edge(edge_data, tree, edge_ids, x, y):
+    max_distance = 1000  # maximum search distance in meters
     
-    while radius < max_radius:
-        edges = net.getNeighboringEdges(x, y, radius)
-        if edges:
-            # Sort by distance and return the closest edge
-            edges.sort(key=lambda x: x[1])  # x[1] is the distance
-            return edges[0][0].getID()  # x[0] is the edge object
-        radius *= 2
-    return None
+    # The nearest edge has an indexed point within half a step of the nearest indexed point
+    distance, idx = tree.query([x, y], distance_upper_bound=max_distance + EDGE_INDEX_STEP / 2)
+    if idx == len(edge_ids):  # No point within max_distance
+        return None
+    candidates = dict.fromkeys(edge_ids[j] for j in tree.query_ball_point([x, y], distance + EDGE_INDEX_STEP / 2))
+    
+    # Measure the distance to the actual edge shapes
+    best_distance, best_edge = min(
+        (geomhelper.distancePointToPolygon((x, y), edge_data[edge_id]["shape"]), edge_id)
+        for edge_id in candidates
+    )
+    if best_distance > max_distance:
+        return None
+    return best_edge
 
 def main():
-    net_file = "../data/test.net.xml"
-    network = net.readNet(net_file)
-    
-    # Get and display valid edges
-    valid_edges = []
-    print("\nAvailable edges and their coordinates:")
-    print("ID\t\tStart(x,y)\t\tEnd(x,y)")
-    print("-" * 50)
-    for edge in network.getEdges():
-        if is_valid_vehicle_edge(network, edge.getID()):
-            valid_edges.append(edge.getID())
-            # Get edge geometry
-            start_pos = edge.getFromNode().getCoord()
-            end_pos = edge.getToNode().getCoord()
-            print(f"{edge.getID():<15} ({start_pos[0]:.1f},{start_pos[1]:.1f})\t\t({end_pos[0]:.1f},{end_pos[1]:.1f})")
+    parser = argparse.ArgumentParser(description="Find a route in the SUMO network and simulate it with random traffic")
+    parser.add_argument("--verbose", action="store_true", help="list all valid edges and their coordinates")
+    parser.add_argument("--headless", action="store_true", help="run the simulation with sumo instead of sumo-gui")
+    args = parser.parse_args()
     
-    print(f"\nFound {len(valid_edges)} valid edges for routing")
+    net_file = NET_FILE
+    edge_data = read_edge_data(net_file)
     
-    print("\nPlease enter coordinates (or edge IDs):")
-    # Get start location
-    start_input = input("Enter start X coordinate (or edge ID): ")
+    # Keep a single SUMO session open for all route queries
+    init_sumo(net_file)
     try:
-        # Try parsing as coordinates
-        start_x = float(start_input)
-        start_y = float(input("Enter start Y coordinate: "))
-        start_edge = find_nearest_edge(network, start_x, start_y)
-    except ValueError:
-        # If parsing fails, treat input as edge ID
-        start_edge = start_input if start_input in valid_edges else None
+        valid_edges = list(edge_data)
+        
+        # Display valid edges, which floods the terminal on large networks
+        if args.verbose:
+            start_xy = np.array([edge["from"] for edge in edge_data.values()], dtype=np.float32).reshape(-1, 2)
+            end_xy = np.array([edge["to"] for edge in edge_data.values()], dtype=np.float32).reshape(-1, 2)
+            lines = [
+                "\nAvailable edges and their coordinates:",
+                "ID\t\tStart(x,y)\t\tEnd(x,y)",
+                "-" * 50,
+            ] + [
+                f"{edge_id:<15} ({sx:.1f},{sy:.1f})\t\t({ex:.1f},{ey:.1f})"
+                for edge_id, (sx, sy), (ex, ey) in zip(valid_edges, start_xy, end_xy)
+            ]
+            sys.stdout.write("\n".join(lines) + "\n")
     
-    if not start_edge:
-        print("Error: Invalid start location")
-        return
-    print(f"Selected start edge: {start_edge}")
+        print(f"\nFound {len(valid_edges)} valid edges for routing")
+        
+        # Only sample random vehicles where every pair is mutually reachable
+        connected_edges = largest_connected_edges(edge_data, valid_edges)
+        print(f"Using {len(connected_edges)} strongly connected edges for random vehicles")
+        
+        edge_tree, tree_edge_ids = build_edge_index(edge_data, valid_edges)
     
-    # Get end location
-    end_input = input("Enter destination X coordinate (or edge ID): ")
-    try:
-        # Try parsing as coordinates
-        end_x = float(end_input)
-        end_y = float(input("Enter destination Y coordinate: "))
-        end_edge = find_nearest_edge(network, end_x, end_y)
-    except ValueError:
-        # If parsing fails, treat input as edge ID
-        end_edge = end_input if end_input in valid_edges else None
-
-    if not end_edge:
-        print("Error: Invalid destination location")
-        return
-    print(f"Selected destination edge: {end_edge}")
+        print("\nPlease enter coordinates (or edge IDs):")
+        # Get start location
+        start_input = input("Enter start X coordinate (or edge ID): ")
+        try:
+            # Try parsing as coordinates
+            start_x = float(start_input)
+            start_y = float(input("Enter start Y coordinate: "))
+            start_edge = find_nearest_edge(edge_data, edge_tree, tree_edge_ids, start_x, start_y)
+        except ValueError:
+            # If parsing fails, treat input as edge ID
+            start_edge = start_input if start_input in valid_edges else None
+    
+        if not start_edge:
+            print("Error: Invalid start location")
+            return
+        print(f"Selected start edge: {start_edge}")
     
-    # Find and validate route
-    route = find_route(net_file, start_edge, end_edge)
+        # Get end location
+        end_input = input("Enter destination X coordinate (or edge ID): ")
+        try:
+            # Try parsing as coordinates
+            end_x = float(end_input)
+            end_y = float(input("Enter destination Y coordinate: "))
+            end_edge = find_nearest_edge(edge_data, edge_tree, tree_edge_ids, end_x, end_y)
+        except ValueError:
+            # If parsing fails, treat input as edge ID
+            end_edge = end_input if end_input in valid_edges else None
+
+        if not end_edge:
+            print("Error: Invalid destination location")
+            return
+        print(f"Selected destination edge: {end_edge}")
     
-    if route:
+        # Find and validate route
+        route = find_route(start_edge, end_edge)
+        
+        if not route:
+            print(f"\nNo route found between selected locations")
+            return
+        
         print(f"\nRoute found! Edges: {' -> '.join(route)}")
-        save_route_to_file(route, valid_edges, net_file)
-        save_visualization_settings(route)
+        save_route_to_file(route, connected_edges, edge_data, edge_tree, tree_edge_ids)
         
         print("\nStarting simulation...")
-        sumo_gui_cmd = [
-            "sumo-gui",
-            "-n", net_file,
-            "-r", "../data/route.rou.xml",
-            "--gui-settings-file", "../data/settings.xml",
-            "--start",
-            "--delay", "50",  # Reduced delay
-            "--step-length", "0.1",
-            "--begin", "0",  # Start at 0 seconds
-            "--end", "3600",  # Run for 1 hour
-            "--window-size", "800,600",
-            "--window-pos", "50,50",
-            "--no-warnings"
-        ]
-        subprocess.run(sumo_gui_cmd)
-    else:
-        print(f"\nNo route found between selected locations")
+        if args.headless:
+            sumo_cmd = [
+                "sumo",
+                "-n", net_file,
+                "-r", ROUTE_FILE,
+                "--step-length", "0.1",
+                "--begin", "0",  # Start at 0 seconds
+                "--end", "3600",  # Run for 1 hour
+                "--no-step-log",
+                "--no-warnings"
+            ]
+        else:
+            save_visualization_settings(route)
+            sumo_cmd = [
+                "sumo-gui",
+                "-n", net_file,
+                "-r", ROUTE_FILE,
+                "--gui-settings-file", SETTINGS_FILE,
+                "--start",
+                "--delay", "50",  # Reduced delay
+                "--step-length", "0.1",
+                "--begin", "0",  # Start at 0 seconds
+                "--end", "3600",  # Run for 1 hour
+                "--window-size", "800,600",
+                "--window-pos", "50,50",
+                "--no-warnings"
+            ]
+        # Let the simulation start up while the routing session shuts down
+        simulation = subprocess.Popen(sumo_cmd)
+    finally:
+        shutdown_sumo()
+    
+    simulation.wait()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file